@@ -1,32 +1,128 @@
 import tkinter as tk
 from tkinter import filedialog, messagebox, ttk
 import sqlite3
-import pandas as pd
+import numpy as np
 import qrcode
 from fpdf import FPDF
 from PIL import Image, ImageTk
 from datetime import datetime
 import os
-import tempfile
+import bisect
+import functools
+import itertools
 import threading
+import time
 import urllib.parse
 import logging
-import gc  
-from typing import List, Tuple
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from typing import Iterator, List, Optional, Tuple
 
 PRIMARY_COLOR = "#003366"
 TEXT_COLOR = "#FFFFFF"
 QR_IMAGE_SIZE = 150
+# Máscara fija: evita evaluar las 8 máscaras (best_mask_pattern) en cada QR a cambio de una
+# penalización algo peor; el código sigue siendo legible. None restaura la selección automática.
+QR_MASK_PATTERN = 3
+# Capacidad en bytes (modo byte, corrección L) de las versiones 1 a 40 según la norma QR (ISO/IEC 18004).
+QR_BYTE_CAPACITY_L = (
+    17, 32, 53, 78, 106, 134, 154, 192, 230, 271,
+    321, 367, 425, 458, 520, 586, 644, 718, 792, 858,
+    929, 1003, 1091, 1171, 1273, 1367, 1465, 1528, 1628, 1732,
+    1840, 1952, 2068, 2188, 2303, 2431, 2563, 2699, 2809, 2953,
+)
 DATABASE = "qr_codes.db" 
+BULK_INSERT_CHUNK_SIZE = 1000
+QR_CACHE_SIZE = 1024
+# Cada proceso del pool vuelve a importar este módulo, así que se limita su número; con menos de
+# QR_POOL_MIN_TEXTS contenidos distintos se generan en el propio proceso sin arrancar el pool.
+QR_POOL_MAX_WORKERS = 4
+QR_POOL_MIN_TEXTS = 8
+# La barra de progreso y la lista de QRs se refrescan cada UI_UPDATE_EVERY filas o cada UI_UPDATE_INTERVAL segundos.
+UI_UPDATE_EVERY = 25
+UI_UPDATE_INTERVAL = 0.05
+# Solo se mantienen en pantalla los últimos MAX_DISPLAYED_QRS códigos; los más antiguos se destruyen.
+MAX_DISPLAYED_QRS = 200
+# Maquetación del PDF: 3 QRs por página de PDF_QR_PX píxeles, dibujados a PDF_QR_MM mm cada PDF_ROW_MM mm.
+PDF_QRS_PER_PAGE = 3
+PDF_QR_PX = 100
+PDF_QR_MM = 40
+PDF_ROW_MM = 90
+# Formatos que openpyxl lee en streaming; el resto (.xls, .ods, .xlsb...) pasa por pandas.
+OPENPYXL_EXTENSIONS = ('.xlsx', '.xlsm', '.xltx', '.xltm')
 
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
 
+# Solo con QR_MASK_PATTERN = None se evalúan las máscaras: best_mask_pattern() llama a lost_point() para
+# las 8 y _lost_point_level1 (rachas de 5+ módulos iguales) es la parte más costosa. Con la máscara fija
+# no se llama nunca, así que ni siquiera se importa numba (también se ahorra en cada proceso del pool).
+numba = None
+if QR_MASK_PATTERN is None:
+    try:
+        import numba
+    except ImportError:
+        pass
+
+if numba is not None:
+    @numba.njit(cache=True)
+    def _lost_point_level1_jit(modules, modules_count):
+        lost_point = 0
+        for row in range(modules_count):
+            length = 1
+            for col in range(1, modules_count):
+                if modules[row, col] == modules[row, col - 1]:
+                    length += 1
+                else:
+                    if length >= 5:
+                        lost_point += length - 2
+                    length = 1
+            if length >= 5:
+                lost_point += length - 2
+        for col in range(modules_count):
+            length = 1
+            for row in range(1, modules_count):
+                if modules[row, col] == modules[row - 1, col]:
+                    length += 1
+                else:
+                    if length >= 5:
+                        lost_point += length - 2
+                    length = 1
+            if length >= 5:
+                lost_point += length - 2
+        return lost_point
+
+    def _lost_point_level1(modules, modules_count):
+        return int(_lost_point_level1_jit(np.array(modules, dtype=np.uint8), modules_count))
+
+    qrcode.util._lost_point_level1 = _lost_point_level1
+
 class DatabaseManager:
-    @staticmethod
-    def initialize_database():
+    # Una única conexión compartida (también por el hilo de exportación a PDF), protegida por _lock.
+    # isolation_level=None deja cada sentencia en autocommit salvo los BEGIN explícitos.
+    _conn = None
+    _lock = threading.Lock()
+
+    @classmethod
+    def get_connection(cls) -> sqlite3.Connection:
+        if cls._conn is None:
+            conn = sqlite3.connect(DATABASE, check_same_thread=False, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            cls._conn = conn
+        return cls._conn
+
+    @classmethod
+    def close_connection(cls):
+        with cls._lock:
+            if cls._conn is not None:
+                cls._conn.close()
+                cls._conn = None
+
+    @classmethod
+    def initialize_database(cls):
         try:
-            with sqlite3.connect(DATABASE) as conn:
-                cursor = conn.cursor()
+            with cls._lock:
+                cursor = cls.get_connection().cursor()
                 cursor.execute('''
                     CREATE TABLE IF NOT EXISTS qr_codes (
                         id INTEGER PRIMARY KEY AUTOINCREMENT,
@@ -36,45 +132,71 @@ class DatabaseManager:
                         personalizacion TEXT
                     )
                 ''')
-                conn.commit()
         except sqlite3.Error as e:
             logging.error(f"Database initialization error: {e}")
             raise
 
-    @staticmethod
-    def create_qr_code(contenido: str, descripcion: str, personalizacion: str = "") -> bool:
+    @classmethod
+    def create_qr_code(cls, contenido: str, descripcion: str, personalizacion: str = "") -> bool:
         try:
-            with sqlite3.connect(DATABASE) as conn:
-                cursor = conn.cursor()
+            with cls._lock:
+                cursor = cls.get_connection().cursor()
                 fecha_creacion = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
                 cursor.execute('''
                     INSERT INTO qr_codes (contenido, fecha_creacion, descripcion, personalizacion)
                     VALUES (?, ?, ?, ?)
                 ''', (contenido, fecha_creacion, descripcion, personalizacion))
-                conn.commit()
             return True
         except sqlite3.Error as e:
             logging.error(f"Error creating QR in DB: {e}")
             return False
 
-    @staticmethod
-    def get_all_qr_codes() -> List[Tuple]:
+    @classmethod
+    def bulk_create_qr_codes(cls, rows: List[Tuple]) -> bool:
+        try:
+            with cls._lock:
+                conn = cls.get_connection()
+                # Importación masiva sin durabilidad: sin fsync y con el journal en memoria. Si la aplicación o
+                # el equipo caen a mitad de un lote, ese lote se pierde y la base puede quedar dañada; a cambio se
+                # evitan casi todas las escrituras a disco. journal_mode no se puede cambiar dentro de una
+                # transacción, por eso se ajusta antes del BEGIN y se restaura después del COMMIT.
+                conn.execute("PRAGMA synchronous=OFF")
+                conn.execute("PRAGMA journal_mode=MEMORY")
+                conn.execute("PRAGMA temp_store=MEMORY")
+                try:
+                    # El with de la conexión hace COMMIT al salir o ROLLBACK si hay una excepción.
+                    with conn:
+                        conn.execute("BEGIN")
+                        conn.executemany('''
+                            INSERT INTO qr_codes (contenido, fecha_creacion, descripcion, personalizacion)
+                            VALUES (?, ?, ?, ?)
+                        ''', rows)
+                finally:
+                    conn.execute("PRAGMA journal_mode=WAL")
+                    conn.execute("PRAGMA synchronous=NORMAL")
+                    conn.execute("PRAGMA temp_store=DEFAULT")
+            return True
+        except sqlite3.Error as e:
+            logging.error(f"Error bulk creating QRs in DB: {e}")
+            return False
+
+    @classmethod
+    def get_all_qr_codes(cls) -> List[Tuple]:
         try:
-            with sqlite3.connect(DATABASE) as conn:
-                cursor = conn.cursor()
+            with cls._lock:
+                cursor = cls.get_connection().cursor()
                 cursor.execute('SELECT * FROM qr_codes')
                 return cursor.fetchall()
         except sqlite3.Error as e:
             logging.error(f"Error fetching QRs: {e}")
             return []
 
-    @staticmethod
-    def delete_all_qr_codes() -> bool:
+    @classmethod
+    def delete_all_qr_codes(cls) -> bool:
         try:
-            with sqlite3.connect(DATABASE) as conn:
-                cursor = conn.cursor()
+            with cls._lock:
+                cursor = cls.get_connection().cursor()
                 cursor.execute('DELETE FROM qr_codes')
-                conn.commit()
             return True
         except sqlite3.Error as e:
             logging.error(f"Error deleting QRs: {e}")
@@ -87,34 +209,147 @@ class QRGenerator:
             f"PROCHAP\nCódigo: {code}\nDescripción: {description}\n"
             f"Personalización: {personalization}"
         )
-        whatsapp_message = urllib.parse.quote(qr_content)
-        whatsapp_url = f"https://wa.me/?text={whatsapp_message}"
-        return qr_content + f"\nCompartir por WhatsApp: {whatsapp_url}"
+        whatsapp_message = urllib.parse.quote_from_bytes(qr_content.encode('utf-8'))
+        return f"{qr_content}\nCompartir por WhatsApp: https://wa.me/?text={whatsapp_message}"
 
     @staticmethod
     def generate_qr_image(text: str, size: int = QR_IMAGE_SIZE) -> Image.Image:
         try:
+            # La versión sale de la tabla de capacidades en lugar de la búsqueda de best_fit(); el texto se
+            # codifica en un único segmento de modo byte para que la tabla sea exacta. Si no cabe en la
+            # versión 40, version=None deja que make() haga el ajuste normal y lance el error de desbordamiento.
+            version = bisect.bisect_left(QR_BYTE_CAPACITY_L, len(text.encode('utf-8'))) + 1
             qr = qrcode.QRCode(
-                version=1,
+                version=version if version <= len(QR_BYTE_CAPACITY_L) else None,
                 error_correction=qrcode.constants.ERROR_CORRECT_L,
-                box_size=10,
-                border=2
+                border=2,
+                mask_pattern=QR_MASK_PATTERN
             )
-            qr.add_data(text)
-            qr.make(fit=True)
-            qr_image = qr.make_image(fill="black", back_color="white").convert('RGB')
-            return qr_image.resize((size, size), Image.LANCZOS)
+            qr.add_data(text, optimize=0)
+            qr.make(fit=False)
+            # get_matrix() ya incluye el borde; cada módulo se expande a box_size x box_size píxeles con NumPy.
+            # box_size es el mayor entero que cabe en size; el resto (menos de un módulo) lo cubre el reescalado.
+            modules = np.array(qr.get_matrix(), dtype=np.uint8)
+            box_size = max(1, size // len(modules))
+            pixels = np.kron(1 - modules, np.ones((box_size, box_size), dtype=np.uint8)) * 255
+            # Modo '1' (1 bit por píxel): el QR es binario y ocupa 24 veces menos que en RGB.
+            qr_image = Image.fromarray(pixels).convert('1', dither=Image.NONE)
+            if qr_image.size != (size, size):
+                # NEAREST no difumina los bordes de los módulos, así que el QR llena todo el tamaño pedido.
+                qr_image = qr_image.resize((size, size), Image.NEAREST)
+            return qr_image
         except Exception as e:
             logging.error(f"Error generating QR image: {e}")
             return None
 
+    @staticmethod
+    def generate_qr_images(texts: List[str], size: int = QR_IMAGE_SIZE) -> Iterator[Optional[Image.Image]]:
+        # Las imágenes se generan en paralelo en el pool de procesos y se devuelven en el mismo orden que texts.
+        # Los contenidos repetidos se envían una sola vez y cada uno recibe su propia copia de la imagen.
+        # Con pocos contenidos distintos no compensa arrancar el pool; lru_cache ya evita repetir los iguales.
+        if len(set(texts)) < QR_POOL_MIN_TEXTS:
+            for text in texts:
+                result = _render_qr_image(text, size)
+                yield Image.frombytes(*result) if result else None
+            return
+
+        pool = get_process_pool()
+        futures = {}
+        for text in texts:
+            if text not in futures:
+                futures[text] = pool.submit(_render_qr_image, text, size)
+        for text in texts:
+            result = futures[text].result()
+            yield Image.frombytes(*result) if result else None
+
+_POOL = None
+_POOL_LOCK = threading.Lock()
+
+def get_process_pool() -> ProcessPoolExecutor:
+    # Se crea bajo demanda para que los procesos hijos no creen su propio pool al importar el módulo.
+    global _POOL
+    with _POOL_LOCK:
+        if _POOL is None:
+            _POOL = ProcessPoolExecutor(max_workers=min(os.cpu_count() or 1, QR_POOL_MAX_WORKERS))
+        return _POOL
+
+def shutdown_process_pool():
+    global _POOL
+    with _POOL_LOCK:
+        if _POOL is not None:
+            _POOL.shutdown(cancel_futures=True)
+            _POOL = None
+
+@functools.lru_cache(maxsize=QR_CACHE_SIZE)
+def _render_qr_image(text: str, size: int) -> Optional[Tuple[str, Tuple[int, int], bytes]]:
+    # Se ejecuta en el proceso hijo: devuelve los bytes crudos para no serializar objetos PIL.
+    # El resultado es inmutable, así que cada proceso puede cachearlo para contenidos repetidos.
+    qr_image = QRGenerator.generate_qr_image(text, size)
+    if qr_image is None:
+        return None
+    return qr_image.mode, qr_image.size, qr_image.tobytes()
+
+class ExcelSheet:
+    def __init__(self, file_path: str):
+        self._workbook = None
+        if not file_path.lower().endswith(OPENPYXL_EXTENSIONS):
+            # openpyxl no lee .xls, .ods ni .xlsb; para esos archivos se mantiene pandas.
+            # pandas y openpyxl se importan aquí para que los procesos del pool no los carguen.
+            import pandas as pd
+            df = pd.read_excel(file_path, keep_default_na=False)
+            self.header = self._column_names(df.columns)
+            self.total_rows = len(df)
+            self._rows = df.itertuples(index=False, name=None)
+        else:
+            # read_only recorre las filas en streaming sin cargar la hoja completa en memoria.
+            import openpyxl
+            self._workbook = openpyxl.load_workbook(file_path, read_only=True, data_only=True)
+            # Como pd.read_excel (sheet_name=0), siempre la primera hoja y no la activa al guardar.
+            sheet = self._workbook.worksheets[0]
+            self._rows = sheet.iter_rows(values_only=True)
+            self.header = self._column_names(next(self._rows, ()))
+            self.total_rows = max((sheet.max_row or 1) - 1, 0)
+        # Mapa nombre -> índice calculado una sola vez; ante nombres repetidos gana la primera columna.
+        self.column_index = {}
+        for i, name in enumerate(self.header):
+            self.column_index.setdefault(name, i)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    def close(self):
+        if self._workbook is not None:
+            self._workbook.close()
+            self._workbook = None
+
+    def rows(self) -> Iterator[Tuple[int, Tuple]]:
+        # Devuelve (número de fila en Excel, valores) con '' en las celdas vacías y omite las filas vacías.
+        width = len(self.header)
+        for row_number, values in enumerate(self._rows, start=2):
+            values = tuple('' if value is None else value for value in values[:width])
+            if all(value == '' for value in values):
+                continue
+            yield row_number, values + ('',) * (width - len(values))
+
+    def find_column(self, fragment: str) -> Optional[int]:
+        # Primera columna cuyo nombre, en minúsculas y sin espacios, contiene fragment.
+        return next((i for i, name in enumerate(self.header) if fragment in name.lower().replace(' ', '')), None)
+
+    @staticmethod
+    def _column_names(values) -> List[str]:
+        return [f"Unnamed: {i}" if value is None else str(value) for i, value in enumerate(values)]
+
 class QRApp:
     def __init__(self, root):
         self.root = root
         self.root.title("PROCHAP - Generador de Códigos QR")
         self.root.geometry("800x600")
         self.root.configure(bg=PRIMARY_COLOR)
-        self.qr_images = []
+        self.qr_images = deque(maxlen=MAX_DISPLAYED_QRS)
+        self.last_ui_update = 0.0
         DatabaseManager.initialize_database()
         self.create_widgets()
 
@@ -181,11 +416,18 @@ class QRApp:
             self.progress_frame.pack_forget()
 
     def update_progress(self, value: int, max_value: int):
-        percentage = int((value / max_value) * 100)
+        percentage = min(int((value / max_value) * 100), 100)
         self.progress_bar["value"] = percentage
         self.progress_label.config(text=f"Progreso: {percentage}%")
         self.root.update_idletasks()
 
+    def ui_update_due(self, value: int, max_value: int) -> bool:
+        now = time.monotonic()
+        if value % UI_UPDATE_EVERY == 0 or value >= max_value or now - self.last_ui_update > UI_UPDATE_INTERVAL:
+            self.last_ui_update = now
+            return True
+        return False
+
     def generate_and_save_qr(self):
         code = self.code_entry.get().strip()
         description = self.description_entry.get().strip()
@@ -224,15 +466,13 @@ class QRApp:
             if not file_path:
                 return
 
-            df = pd.read_excel(file_path, keep_default_na=False)
-            df = df.dropna(how='all')
+            with ExcelSheet(file_path) as sheet:
+                columnas = sheet.header
 
             # Ventana para seleccionar columnas
             seleccion_columnas = tk.Toplevel(self.root)
             seleccion_columnas.title("Seleccionar Columnas")
 
-            columnas = df.columns.tolist()
-
             tk.Label(seleccion_columnas, text="Selecciona la columna 'Código':").grid(row=0, column=0, padx=5, pady=5, sticky="w")
             self.codigo_combobox = ttk.Combobox(seleccion_columnas, values=columnas)
             self.codigo_combobox.grid(row=0, column=1, padx=5, pady=5)
@@ -263,55 +503,46 @@ class QRApp:
 
     def importar_datos(self, file_path, codigo_col, descripcion_col):
         try:
-            df = pd.read_excel(file_path, keep_default_na=False)
-            df = df.dropna(how='all')
+            with ExcelSheet(file_path) as sheet:
+                codigo_idx = sheet.column_index[codigo_col]
+                descripcion_idx = sheet.column_index[descripcion_col]
+                personalizacion_idx = sheet.find_column('personalizacion')
 
-            personalizacion_col = next((col for col in df.columns if 'personalizacion' in col.lower().replace(' ', '')), None)
-            if personalizacion_col is None:
-                df['personalizacion'] = ''
-                personalizacion_col = 'personalizacion'
+                total_rows = max(sheet.total_rows, 1)
+                self.show_progress(True)
 
-            total_rows = len(df)
-            self.show_progress(True)
+                success_count = 0
+                error_count = 0
+                skipped_count = 0
+                fecha_creacion = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+                batch = []
 
-            success_count = 0
-            error_count = 0
-            skipped_count = 0
+                for row_number, row in sheet.rows():
+                    try:
+                        code = str(row[codigo_idx]).strip()
+                        description = str(row[descripcion_idx]).strip()
+                        personalization = str(row[personalizacion_idx]).strip() if personalizacion_idx is not None else ''
 
-            for index, row in df.iterrows():
-                try:
-                    code = str(row[codigo_col]).strip()
-                    description = str(row[descripcion_col]).strip()
-                    personalization = str(row.get(personalizacion_col, '')).strip()
+                        if not code or not description:
+                            logging.warning(f"Fila {row_number}: código o descripción vacíos, saltando.")
+                            skipped_count += 1
+                            continue
 
-                    if not code or not description:
-                        logging.warning(f"Fila {index + 2}: código o descripción vacíos, saltando.")
-                        skipped_count += 1
-                        continue
+                        qr_content = QRGenerator.create_qr_content(code, description, personalization)
+                        batch.append((row_number, code, description, personalization, qr_content))
 
-                    qr_content = QRGenerator.create_qr_content(code, description, personalization)
-                    if DatabaseManager.create_qr_code(qr_content, description, personalization):
-                        qr_image = QRGenerator.generate_qr_image(qr_content)
-                        if qr_image:
-                            self.show_qr_image(qr_image, f"{code} - {description}")
-                            success_count += 1
-                            qr_image.close()  
-                            gc.collect()  
-                        else:
-                            logging.error(f"Fila {index + 2}: no se pudo generar la imagen QR.")
-                            error_count += 1
-                    else:
-                        logging.error(f"Fila {index + 2}: no se pudo guardar en la base de datos.")
+                    except Exception as e:
+                        logging.error(f"Fila {row_number}: error inesperado - {e}")
                         error_count += 1
 
-                except KeyError as e:
-                    logging.error(f"Fila {index + 2}: columna faltante - {e}")
-                    error_count += 1
-                except Exception as e:
-                    logging.error(f"Fila {index + 2}: error inesperado - {e}")
-                    error_count += 1
+                    if len(batch) >= BULK_INSERT_CHUNK_SIZE:
+                        saved, failed = self.procesar_lote(batch, fecha_creacion, total_rows)
+                        success_count += saved
+                        error_count += failed
 
-                self.update_progress(index + 1, total_rows)
+                saved, failed = self.procesar_lote(batch, fecha_creacion, total_rows)
+                success_count += saved
+                error_count += failed
 
             self.show_progress(False)
 
@@ -329,6 +560,48 @@ class QRApp:
             logging.error(f"Error general al procesar el archivo Excel: {e}")
             messagebox.showerror("Error", f"Error al procesar el archivo Excel: {str(e)}")
 
+    def procesar_lote(self, batch: List[Tuple], fecha_creacion: str, total_rows: int) -> Tuple[int, int]:
+        if not batch:
+            return 0, 0
+        # El lote se guarda antes de mostrar nada: solo se muestran QRs que quedaron en la base de datos.
+        pending_rows = [(qr_content, fecha_creacion, description, personalization)
+                        for _, _, description, personalization, qr_content in batch]
+        saved, failed = self.guardar_lote(pending_rows)
+        if failed:
+            self.update_progress(batch[-1][0] - 1, total_rows)
+            batch.clear()
+            return 0, failed
+
+        error_count = 0
+        pending_images = []
+        qr_images = QRGenerator.generate_qr_images([qr_content for *_, qr_content in batch])
+
+        for (row_number, code, description, personalization, qr_content), qr_image in zip(batch, qr_images):
+            if qr_image:
+                pending_images.append((qr_image, f"{code} - {description}"))
+            else:
+                logging.error(f"Fila {row_number}: no se pudo generar la imagen QR.")
+                error_count += 1
+            # Se ejecuta en el hilo principal: se muestra directamente, root.after no correría hasta terminar.
+            if self.ui_update_due(row_number - 1, total_rows):
+                self.show_qr_images(pending_images)
+                self.update_progress(row_number - 1, total_rows)
+
+        self.show_qr_images(pending_images)
+        batch.clear()
+        return saved - error_count, error_count
+
+    def guardar_lote(self, pending_rows: List[Tuple]) -> Tuple[int, int]:
+        if not pending_rows:
+            return 0, 0
+        count = len(pending_rows)
+        saved = DatabaseManager.bulk_create_qr_codes(pending_rows)
+        pending_rows.clear()
+        if saved:
+            return count, 0
+        logging.error(f"No se pudo guardar un lote de {count} filas en la base de datos.")
+        return 0, count
+
     def export_pdf_async(self):
         threading.Thread(target=self.export_pdf, daemon=True).start()
 
@@ -348,37 +621,38 @@ class QRApp:
             pdf = FPDF()
             pdf.set_auto_page_break(auto=True, margin=15)
             pdf.add_page()
-            pdf.set_font("Arial", size=12)
+            pdf.set_font("helvetica", size=12)
 
             total_qrs = len(qr_data)
+            qr_images = QRGenerator.generate_qr_images([record[1] for record in qr_data], size=PDF_QR_PX)
+            records = enumerate(zip(qr_data, qr_images))
 
-            for i, (_, contenido, fecha_creacion, descripcion, personalizacion) in enumerate(qr_data):
-                if i > 0 and i % 3 == 0:
+            for page_start in range(0, total_qrs, PDF_QRS_PER_PAGE):
+                if page_start > 0:
                     pdf.add_page()
 
-                qr_image = QRGenerator.generate_qr_image(contenido, size=100)
-                if not qr_image:
-                    logging.error(f"No se pudo generar la imagen QR para el contenido del registro {i + 1}.")
-                    continue
-
-                with tempfile.NamedTemporaryFile(delete=False, suffix=".png") as temp_file:
-                    temp_file_path = temp_file.name
-                    qr_image.save(temp_file_path, format="PNG")
+                # Las imágenes de la página se insertan antes que el texto: si un multi_cell provoca un salto
+                # de página automático, los QRs siguen quedando en la página a la que pertenecen.
+                page = list(itertools.islice(records, PDF_QRS_PER_PAGE))
+                page_slots = []
+                for i, (_, qr_image) in page:
+                    if qr_image is None:
+                        logging.error(f"No se pudo generar la imagen QR para el contenido del registro {i + 1}.")
+                    else:
+                        page_slots.append((i % PDF_QRS_PER_PAGE, qr_image))
+                self.insertar_qrs_pagina(pdf, page_slots)
 
-                try:
-                    current_y = 10 + (i % 3) * 90
-                    pdf.image(temp_file_path, x=10, y=current_y, w=40, h=40)
-                    pdf.set_xy(60, current_y)
-                    pdf.multi_cell(0, 10, txt=f"Descripción: {descripcion}\nFecha: {fecha_creacion}\nPersonalización: {personalizacion}")
-                except Exception as e:
-                    logging.error(f"Error al incluir la imagen QR en el PDF: {e}")
-                finally:
-                    if os.path.exists(temp_file_path):
-                        os.remove(temp_file_path)
+                for i, ((_, contenido, fecha_creacion, descripcion, personalizacion), qr_image) in page:
+                    if qr_image is None:
+                        continue
+                    try:
+                        current_y = 10 + (i % PDF_QRS_PER_PAGE) * PDF_ROW_MM
+                        pdf.set_xy(60, current_y)
+                        pdf.multi_cell(0, 10, text=f"Descripción: {descripcion}\nFecha: {fecha_creacion}\nPersonalización: {personalizacion}")
+                    except Exception as e:
+                        logging.error(f"Error al incluir el texto del QR en el PDF: {e}")
 
-                qr_image.close()
-                gc.collect()  
-                self.root.after(0, self.update_progress, i + 1, total_qrs)
+                    self.root.after(0, self.update_progress, i + 1, total_qrs)
 
             pdf.output(file_path)
             self.root.after(0, self.show_progress, False)
@@ -389,6 +663,26 @@ class QRApp:
             self.root.after(0, self.show_progress, False)
             self.root.after(0, lambda: messagebox.showerror("Error", f"No se pudo exportar a PDF: {str(e)}"))
 
+    def insertar_qrs_pagina(self, pdf, page_slots: List[Tuple]):
+        # Compone los QRs de la página (posición, imagen) en un único lienzo de 1 bit y lo inserta
+        # con una sola llamada a pdf.image(), en lugar de una imagen embebida por QR.
+        if not page_slots:
+            return
+        try:
+            px_per_mm = PDF_QR_PX / PDF_QR_MM
+            height_mm = PDF_QR_MM + page_slots[-1][0] * PDF_ROW_MM
+            canvas = Image.new('1', (PDF_QR_PX, round(height_mm * px_per_mm)), 1)
+            for slot, qr_image in page_slots:
+                canvas.paste(qr_image, (0, round(slot * PDF_ROW_MM * px_per_mm)))
+            pdf.image(canvas, x=10, y=10, w=PDF_QR_MM, h=height_mm)
+            canvas.close()
+        except Exception as e:
+            logging.error(f"Error al incluir las imágenes QR en el PDF: {e}")
+        finally:
+            for _, qr_image in page_slots:
+                qr_image.close()
+            page_slots.clear()
+
     def show_all_qr_codes_async(self):
         threading.Thread(target=self.show_all_qr_codes, daemon=True).start()
 
@@ -402,29 +696,43 @@ class QRApp:
             total_records = len(records)
             self.root.after(0, self.show_progress, True)
 
-            for i, record in enumerate(records):
+            qr_images = QRGenerator.generate_qr_images([record[1] for record in records])
+            pending_images = []
+
+            for i, (record, qr_image) in enumerate(zip(records, qr_images)):
                 qr_id, contenido, fecha_creacion, descripcion, personalizacion = record
-                qr_image = QRGenerator.generate_qr_image(contenido)
                 if qr_image:
-                    self.root.after(0, self.show_qr_image, qr_image, f"ID: {qr_id} - {descripcion}\nFecha: {fecha_creacion}")
-                    qr_image.close()
-                    gc.collect()
-                self.root.after(0, self.update_progress, i + 1, total_records)
+                    pending_images.append((qr_image, f"ID: {qr_id} - {descripcion}\nFecha: {fecha_creacion}"))
+                if self.ui_update_due(i + 1, total_records):
+                    self.root.after(0, self.show_qr_images, pending_images)
+                    self.root.after(0, self.update_progress, i + 1, total_records)
+                    pending_images = []
 
+            self.root.after(0, self.show_qr_images, pending_images)
             self.root.after(0, self.show_progress, False)
         except Exception as e:
             logging.error(f"Error displaying QRs: {e}")
             self.root.after(0, self.show_progress, False)
             self.root.after(0, lambda: messagebox.showerror("Error", f"Error al mostrar QRs: {str(e)}"))
 
+    def show_qr_images(self, pending_images: List[Tuple]):
+        # Muestra de una vez las imágenes acumuladas (imagen, descripción) y vacía la lista; las que
+        # quedarían fuera del límite de MAX_DISPLAYED_QRS ni siquiera se crean.
+        for qr_image, description in pending_images[-MAX_DISPLAYED_QRS:]:
+            self.show_qr_image(qr_image, description)
+        pending_images.clear()
+
     def show_qr_image(self, qr_image, description):
         try:
             tk_image = ImageTk.PhotoImage(qr_image)
-        
-            self.qr_images.append(tk_image)
+
+            if len(self.qr_images) == self.qr_images.maxlen:
+                oldest_frame, _ = self.qr_images[0]
+                oldest_frame.destroy()
   
             frame = ttk.Frame(self.qr_display, relief="solid", padding=10)
             frame.pack(padx=5, pady=5, fill="x", expand=True)
+            self.qr_images.append((frame, tk_image))
 
             label_image = tk.Label(frame, image=tk_image)
             label_image.image = tk_image  
@@ -445,7 +753,7 @@ class QRApp:
         try:
             file_path = filedialog.asksaveasfilename(defaultextension=".png", filetypes=[("PNG files", "*.png"), ("All files", "*.*")], title="Guardar QR como")
             if file_path:
-                qr_image.save(file_path, "PNG")
+                qr_image.save(file_path, "PNG", optimize=True)
                 messagebox.showinfo("Éxito", "Imagen QR guardada correctamente")
         except Exception as e:
             logging.error(f"Error saving individual QR: {e}")
@@ -466,6 +774,8 @@ def main():
         root = tk.Tk()
         app = QRApp(root)
         root.mainloop()
+        DatabaseManager.close_connection()
+        shutdown_process_pool()
     except Exception as e:
         logging.error(f"Main application error: {e}")
         messagebox.showerror("Error", f"Error en la aplicación principal: {str(e)}")